@@ -1,44 +1,223 @@
 import pandas as pd
+import numpy as np
+import pyarrow
+import hashlib
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _count_unique_codes(codes, n_codes, mask):
+    """Zählt die verschiedenen (faktorisierten) Codes, die unter der Maske vorkommen."""
+    seen = np.zeros(n_codes, dtype=bool)
+    seen[codes[mask & (codes >= 0)]] = True
+    return int(seen.sum())
+
+
+def _category_mask(series, value):
+    """Vergleicht eine category-Spalte über ihre int-Codes statt per String-Vergleich mit einem Wert."""
+    categories = series.cat.categories
+    if value not in categories:
+        return np.zeros(len(series), dtype=bool)
+    return series.cat.codes.to_numpy() == categories.get_loc(value)
+
+
+def _hour_histogram(timestamps):
+    """Zählt datetime64-Zeitstempel (ohne NaT) pro Stunde (0-23) in einem einzigen bincount-Durchlauf."""
+    hours = timestamps.astype('datetime64[h]').view(np.int64) % 24
+    return np.bincount(hours, minlength=24)
+
+
+def _cache_fingerprint(read_options):
+    """Kurzer Hash über Leseoptionen und pandas/pyarrow-Version, der den Parquet-Cache einer Tabelle kennzeichnet."""
+    key = repr((sorted(read_options.items()), pd.__version__, pyarrow.__version__))
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def _schema_problems(df, read_options):
+    """Vergleicht Spalten und Datentypen einer gelesenen Tabelle mit den Leseoptionen aus CSV_FILES."""
+    problems = []
+    expected_columns = set(read_options['usecols'])
+    if set(df.columns) != expected_columns:
+        problems.append(f"Spalten {sorted(df.columns)} statt {sorted(expected_columns)}")
+        return problems
+
+    for column, dtype in read_options.get('dtype', {}).items():
+        if str(df[column].dtype) != dtype:
+            problems.append(f"{column} ist {df[column].dtype} statt {dtype}")
+    for column in read_options.get('parse_dates', []):
+        if df[column].dtype != np.dtype('datetime64[ns]'):
+            problems.append(f"{column} ist {df[column].dtype} statt datetime64[ns]")
+    return problems
+
+
+def _lazy_table(name):
+    """Property, die eine Tabelle erst beim ersten Zugriff einliest und danach zwischenspeichert."""
+    def getter(self):
+        return self._load_table(name)
+
+    def setter(self, value):
+        self._tables[name] = value
+
+    return property(getter, setter)
 
 
 class CityCarDataHandler:
     """Klasse zum Laden und Vorbereiten der CityCar Daten."""
 
+    # Tabellenname -> Datei und Leseoptionen. Es werden nur die Spalten gelesen, die die Analysen
+    # tatsächlich verwenden; IDs als int32, wiederkehrende Texte als category.
+    CSV_FILES = {
+        'downloads': {
+            'filename': 'app_downloads.csv',
+            'usecols': ['app_download_key', 'platform'],
+            'dtype': {'platform': 'category'}
+        },
+        'signups': {
+            'filename': 'signups.csv',
+            'usecols': ['user_id', 'session_id', 'age_range'],
+            'dtype': {'user_id': 'int32[pyarrow]', 'age_range': 'category'}
+        },
+        'requests': {
+            'filename': 'ride_requests.csv',
+            'usecols': ['ride_id', 'user_id', 'driver_id', 'request_ts', 'accept_ts', 'pickup_ts', 'dropoff_ts',
+                        'cancel_ts'],
+            'dtype': {'ride_id': 'int32[pyarrow]', 'user_id': 'int32[pyarrow]', 'driver_id': 'int32[pyarrow]'},
+            'parse_dates': ['request_ts', 'accept_ts', 'pickup_ts', 'dropoff_ts', 'cancel_ts']
+        },
+        'transactions': {
+            'filename': 'transactions.csv',
+            'usecols': ['ride_id', 'purchase_amount_usd', 'charge_status'],
+            'dtype': {'ride_id': 'int32[pyarrow]', 'charge_status': 'category'}
+        },
+        'reviews': {
+            'filename': 'reviews.csv',
+            'usecols': ['review_id', 'ride_id'],
+            'dtype': {'review_id': 'int32[pyarrow]', 'ride_id': 'int32[pyarrow]'}
+        }
+    }
+
+    # Unterordner von data_folder für die Parquet-Caches
+    CACHE_FOLDER = '.cache'
+
+    df_downloads = _lazy_table('downloads')
+    df_signups = _lazy_table('signups')
+    df_requests = _lazy_table('requests')
+    df_transactions = _lazy_table('transactions')
+    df_reviews = _lazy_table('reviews')
+
     def __init__(self, data_folder='data'):
         self.data_folder = data_folder
-        self.df_downloads = None
-        self.df_signups = None
-        self.df_requests = None
-        self.df_transactions = None
-        self.df_reviews = None
+        self._tables = {}
         self.df_funnel = None
 
+    def _read_csv(self, filename, **read_options):
+        """Liest eine CSV Datei und parst die Zeitspalten direkt beim Einlesen.
+
+        Die Zeitspalten parst der ISO-Parser von Arrow (ein date_format würde unter pandas 2.x
+        Spalten mit Lücken als Strings belassen). Danach werden sie einheitlich in NumPy
+        datetime64[ns] umgewandelt, damit NaT und die Minuten-Berechnungen unabhängig
+        von der pandas-Version gleich funktionieren.
+        """
+        df = pd.read_csv(
+            os.path.join(self.data_folder, filename),
+            engine='pyarrow',
+            dtype_backend='pyarrow',
+            **read_options
+        )
+        date_columns = read_options.get('parse_dates') or []
+        return df.astype({column: 'datetime64[ns]' for column in date_columns})
+
+    def _cache_path(self, read_options):
+        """Pfad des Parquet-Caches im Unterordner .cache; der Dateiname enthält den Fingerprint der Leseoptionen."""
+        stem = os.path.splitext(read_options['filename'])[0]
+        return os.path.join(self.data_folder, self.CACHE_FOLDER, f"{stem}.{_cache_fingerprint(read_options)}.parquet")
+
+    def _read_cache(self, read_options):
+        """Liest den Parquet-Cache einer Tabelle oder gibt None zurück, wenn er fehlt, veraltet oder ungültig ist."""
+        csv_path = os.path.join(self.data_folder, read_options['filename'])
+        parquet_path = self._cache_path(read_options)
+        if not os.path.exists(parquet_path) or os.path.getmtime(parquet_path) < os.path.getmtime(csv_path):
+            return None
+
+        try:
+            df = pd.read_parquet(parquet_path, engine='pyarrow')
+        except (OSError, ValueError) as e:
+            print(f"Parquet-Cache {parquet_path} nicht lesbar, lese CSV: {e}")
+            return None
+        if _schema_problems(df, read_options):
+            print(f"Parquet-Cache {parquet_path} passt nicht zum erwarteten Schema, lese CSV.")
+            return None
+        return df
+
+    def _write_cache(self, df, read_options):
+        """Schreibt den Parquet-Cache einer Tabelle und entfernt im Cache-Ordner die Caches mit anderem Fingerprint."""
+        parquet_path = self._cache_path(read_options)
+        cache_folder = os.path.dirname(parquet_path)
+        stem = os.path.splitext(read_options['filename'])[0]
+        try:
+            os.makedirs(cache_folder, exist_ok=True)
+            df.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+            # Nur eigene Cache-Dateien <table>.<12 Hex-Zeichen>.parquet löschen, keine anderen Dateien
+            cache_pattern = re.compile(rf"{re.escape(stem)}\.[0-9a-f]{{12}}\.parquet")
+            for old_name in os.listdir(cache_folder):
+                old_path = os.path.join(cache_folder, old_name)
+                if cache_pattern.fullmatch(old_name) and old_path != parquet_path:
+                    os.remove(old_path)
+        except OSError as e:
+            print(f"Parquet-Cache für {read_options['filename']} konnte nicht geschrieben werden: {e}")
+
+    def _load_table(self, name):
+        """Liest eine einzelne Tabelle, falls sie noch nicht geladen wurde.
+
+        Bevorzugt wird ein gültiger Parquet-Cache; sonst wird die CSV geparst, geprüft und erst
+        nach erfolgreicher Nachbearbeitung als Cache gespeichert.
+        """
+        if name not in self._tables:
+            read_options = self.CSV_FILES[name]
+            df = self._read_cache(read_options)
+            from_csv = df is None
+            if from_csv:
+                df = self._read_csv(**read_options)
+                problems = _schema_problems(df, read_options)
+                if problems:
+                    raise ValueError(f"Unerwartetes Schema in {read_options['filename']}: {'; '.join(problems)}")
+
+            # Der Cache enthält nur die gelesenen Spalten, abgeleitete Spalten werden immer neu berechnet
+            cache_columns = list(df.columns)
+            if name == 'requests':
+                self._add_ride_durations(df)
+            if from_csv:
+                self._write_cache(df[cache_columns], read_options)
+            self._tables[name] = df
+        return self._tables[name]
+
     def load_data(self):
-        """Lädt alle CSV Dateien und wandelt Zeitspalten in Datetime-Format um."""
+        """Lädt alle noch fehlenden CSV Dateien parallel und wandelt Zeitspalten in Datetime-Format um."""
         try:
             print("Lade Daten...")
-            self.df_downloads = pd.read_csv(os.path.join(self.data_folder, 'app_downloads.csv'))
-            self.df_signups = pd.read_csv(os.path.join(self.data_folder, 'signups.csv'))
-            self.df_requests = pd.read_csv(os.path.join(self.data_folder, 'ride_requests.csv'))
-            self.df_transactions = pd.read_csv(os.path.join(self.data_folder, 'transactions.csv'))
-            self.df_reviews = pd.read_csv(os.path.join(self.data_folder, 'reviews.csv'))
-
-            self.df_requests['pickup_ts'] = pd.to_datetime(self.df_requests['pickup_ts'])
-            self.df_requests['dropoff_ts'] = pd.to_datetime(self.df_requests['dropoff_ts'])
-            self.df_requests['request_ts'] = pd.to_datetime(self.df_requests['request_ts'])
-            self.df_requests['accept_ts'] = pd.to_datetime(self.df_requests['accept_ts'])
-            self.df_requests['cancel_ts'] = pd.to_datetime(self.df_requests['cancel_ts'])
+            missing = [name for name in self.CSV_FILES if name not in self._tables]
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(self._load_table, missing))
 
             print("Daten erfolgreich geladen und Zeiten konvertiert.")
         except Exception as e:
             print(f"Fehler beim Laden: {e}")
 
+    @staticmethod
+    def _add_ride_durations(df_requests):
+        """Berechnet die Fahrt- und Wartezeiten (in Minuten) einmalig als Spalten von df_requests."""
+        one_minute = pd.Timedelta(minutes=1)
+        df_requests['duration_min'] = (df_requests['dropoff_ts'] - df_requests['pickup_ts']) / one_minute
+        df_requests['wait_min'] = (df_requests['pickup_ts'] - df_requests['accept_ts']) / one_minute
+        df_requests['patience_min'] = (df_requests['cancel_ts'] - df_requests['accept_ts']) / one_minute
+
     def get_raw_tables(self):
-        """Gibt alle einzelnen Tabellen in einem Dictionary zurück."""
-        if self.df_downloads is None:
-            self.load_data()
+        """Gibt alle einzelnen Tabellen in einem Dictionary zurück.
 
+        Die Tabellen enthalten nur die Spalten aus CSV_FILES (usecols), nicht alle Spalten der CSV.
+        Die vollständigen Spaltennamen liefert get_csv_columns.
+        """
         return {
             'Downloads': self.df_downloads,
             'Signups': self.df_signups,
@@ -47,57 +226,55 @@ class CityCarDataHandler:
             'Reviews': self.df_reviews
         }
 
-    def merge_all_data(self):
-        """Verbindet alle Tabellen mittels LEFT JOINS zu einem Funnel-DataFrame."""
-        if self.df_downloads is None:
-            self.load_data()
+    def get_csv_columns(self):
+        """Liest nur die Kopfzeilen der CSV Dateien und gibt alle Spaltennamen pro Tabelle zurück."""
+        labels = {
+            'Downloads': 'downloads',
+            'Signups': 'signups',
+            'Requests': 'requests',
+            'Transactions': 'transactions',
+            'Reviews': 'reviews'
+        }
+        return {
+            label: pd.read_csv(os.path.join(self.data_folder, self.CSV_FILES[name]['filename']), nrows=0).columns.tolist()
+            for label, name in labels.items()
+        }
 
+    def merge_all_data(self):
+        """Verbindet alle Tabellen mittels LEFT JOINS zu einem schmalen Funnel-DataFrame."""
         print("Starte Merging der Tabellen...")
 
-        self.df_funnel = pd.merge(
-            self.df_downloads,
-            self.df_signups,
-            how='left',
-            left_on='app_download_key',
-            right_on='session_id'
-        )
+        # Rechte Tabellen auf die für den Funnel benötigten Spalten reduzieren
+        # und einmalig auf den Join-Schlüssel indexieren
+        signups = self.df_signups[['session_id', 'user_id', 'age_range']].set_index('session_id')
+        requests = self.df_requests[['user_id', 'ride_id', 'request_ts', 'accept_ts', 'dropoff_ts']].set_index('user_id')
+        transactions = self.df_transactions[['ride_id', 'charge_status']].set_index('ride_id')
+        # Reviews vorab pro Fahrt zählen, damit mehrere Reviews pro Fahrt keine Zeilen vervielfachen
+        review_counts = self.df_reviews.groupby('ride_id', sort=False).size().rename('review_count')
 
-        self.df_funnel = pd.merge(
-            self.df_funnel,
-            self.df_requests,
-            how='left',
-            on='user_id'
+        self.df_funnel = self.df_downloads[['app_download_key', 'platform']].join(
+            signups, on='app_download_key', how='left', sort=False, validate='m:1'
         )
 
-        self.df_funnel = pd.merge(
-            self.df_funnel,
-            self.df_transactions,
-            how='left',
-            on='ride_id'
+        # Ein Nutzer kann mehrere Fahrten anfragen, daher hier kein validate
+        self.df_funnel = self.df_funnel.join(
+            requests, on='user_id', how='left', sort=False
         )
 
-        self.df_funnel = pd.merge(
-            self.df_funnel,
-            self.df_reviews,
-            how='left',
-            on='ride_id'
+        self.df_funnel = self.df_funnel.join(
+            transactions, on='ride_id', how='left', sort=False, validate='m:1'
         )
 
-        if 'driver_id_x' in self.df_funnel.columns:
-            self.df_funnel.rename(columns={'driver_id_x': 'driver_id'}, inplace=True)
-
-        if 'user_id_x' in self.df_funnel.columns:
-            self.df_funnel.rename(columns={'user_id_x': 'user_id'}, inplace=True)
+        self.df_funnel = self.df_funnel.join(
+            review_counts, on='ride_id', how='left', sort=False, validate='m:1'
+        ).reset_index(drop=True)
 
         print(f"Merging abgeschlossen. Master-Table Größe: {self.df_funnel.shape}")
         return self.df_funnel
 
     def analyze_ride_duration_quality(self):
         """Analysiert die Fahrtdauer auf Ausreißer."""
-        if self.df_requests is None:
-            self.load_data()
-
-        durations = (self.df_requests['dropoff_ts'] - self.df_requests['pickup_ts']).dt.total_seconds() / 60
+        durations = self.df_requests['duration_min']
         stats_report = durations.describe()
         long_rides = durations[durations > 300].count()
         negative_rides = durations[durations < 0].count()
@@ -106,18 +283,13 @@ class CityCarDataHandler:
 
     def get_warmup_stats(self):
         """Beantwortet die Warm-up Fragen aus der Aufgabe."""
-        if self.df_requests is None:
-            self.load_data()
-
         stats = {
             '1_downloads': len(self.df_downloads),
             '2_signups': len(self.df_signups),
             '3_rides_requested': len(self.df_requests),
             '4_rides_completed': self.df_requests['dropoff_ts'].count(),
             '5_unique_users_requesting': self.df_requests['user_id'].nunique(),
-            '6_avg_duration_minutes': round(
-                ((self.df_requests['dropoff_ts'] - self.df_requests['pickup_ts']).dt.total_seconds() / 60).mean(), 2
-            ),
+            '6_avg_duration_minutes': round(self.df_requests['duration_min'].mean(), 2),
             '7_rides_accepted': self.df_requests['accept_ts'].count(),
             '8_total_revenue': self.df_transactions['purchase_amount_usd'].sum(),
             '9_platform_counts': self.df_downloads['platform'].value_counts().to_dict()
@@ -127,16 +299,27 @@ class CityCarDataHandler:
 
     def calculate_funnel_steps(self):
         """Berechnet die Anzahl der Unique Users für jede Funnel-Stufe."""
-        if self.df_funnel is None:
-            self.merge_all_data()
+        # Direkt auf den Quelltabellen zählen statt auf dem aufgeblähten Funnel-DataFrame.
+        # Die isin-Filter bilden die LEFT JOINS Download -> Signup -> Request nach.
+        signups = self.df_signups[self.df_signups['session_id'].isin(self.df_downloads['app_download_key'])]
+        requests = self.df_requests[self.df_requests['user_id'].isin(signups['user_id'])]
+        approved_rides = self.df_transactions.loc[
+            _category_mask(self.df_transactions['charge_status'], 'Approved'), 'ride_id'
+        ]
 
-        step_1_downloads = self.df_funnel['app_download_key'].nunique()
-        step_2_signups = self.df_funnel['user_id'].nunique()
-        users_requested = self.df_funnel[self.df_funnel['request_ts'].notna()]['user_id'].nunique()
-        users_accepted = self.df_funnel[self.df_funnel['accept_ts'].notna()]['user_id'].nunique()
-        users_completed = self.df_funnel[self.df_funnel['dropoff_ts'].notna()]['user_id'].nunique()
-        users_paid = self.df_funnel[self.df_funnel['charge_status'] == 'Approved']['user_id'].nunique()
-        users_reviewed = self.df_funnel[self.df_funnel['review_id'].notna()]['user_id'].nunique()
+        step_1_downloads = self.df_downloads['app_download_key'].nunique()
+        step_2_signups = signups['user_id'].nunique()
+        # user_id einmal faktorisieren, danach nur noch boolesche Masken auf den Codes
+        codes, user_ids = pd.factorize(requests['user_id'], sort=False)
+        n_users = len(user_ids)
+
+        users_requested = _count_unique_codes(codes, n_users, requests['request_ts'].notna().to_numpy())
+        users_accepted = _count_unique_codes(codes, n_users, requests['accept_ts'].notna().to_numpy())
+        users_completed = _count_unique_codes(codes, n_users, requests['dropoff_ts'].notna().to_numpy())
+        users_paid = _count_unique_codes(codes, n_users, requests['ride_id'].isin(approved_rides).to_numpy())
+        users_reviewed = _count_unique_codes(
+            codes, n_users, requests['ride_id'].isin(self.df_reviews['ride_id']).to_numpy()
+        )
 
         return {
             'steps': ['Downloads', 'Signups', 'Requests', 'Accepted', 'Completed', 'Payment', 'Reviews'],
@@ -146,31 +329,32 @@ class CityCarDataHandler:
 
     def get_patience_metrics(self):
 
-
-        if self.df_requests is None: self.load_data()
-
+        # Zeitspalten einmal als NumPy-Arrays, statt pro Kennzahl den DataFrame zu filtern
+        request_ts = self.df_requests['request_ts'].to_numpy()
+        accept_ts = self.df_requests['accept_ts'].to_numpy()
+        cancel_ts = self.df_requests['cancel_ts'].to_numpy()
+        one_minute = np.timedelta64(1, 'm')
 
 # 1. PHASE SUCHE (Request -> Accept)
 
 # Realität: Wie lange dauert es im Median, bis akzeptiert wird?
 
-        search_reality = (self.df_requests[self.df_requests['accept_ts'].notna()]['accept_ts'] - self.df_requests[self.df_requests['accept_ts'].notna()]['request_ts']).dt.total_seconds().median() / 60
+        search_reality = pd.Series((accept_ts - request_ts) / one_minute).median()
 
 # Geduld: Wie lange warten Nutzer, die dann abbrechen (ohne Zusage). Diese Gruppe ist für uns, als Verkäufer relevant (kein Survivorship Bias)?
 
 
-        search_patience = (self.df_requests[(self.df_requests['cancel_ts'].notna()) & (self.df_requests['accept_ts'].isna())]['cancel_ts'] -
-        self.df_requests[(self.df_requests['cancel_ts'].notna()) & (self.df_requests['accept_ts'].isna())]['request_ts']).dt.total_seconds().median() / 60
+        search_patience = pd.Series(((cancel_ts - request_ts) / one_minute)[np.isnat(accept_ts)]).median()
 
 # 2. PHASE ABHOLUNG (Accept -> Pickup)
 
 # Realität: Wie lange braucht der Fahrer zum Kunden?
-        pickup_reality = (self.df_requests[self.df_requests['pickup_ts'].notna()]['pickup_ts'] - self.df_requests[self.df_requests['pickup_ts'].notna()]['accept_ts']).dt.total_seconds().median() / 60
+        pickup_reality = self.df_requests['wait_min'].median()
 
 # Geduld: Wie lange warten Nutzer nach der Zusage, bevor sie DOCH NOCH stornieren?
 
 
-        pickup_patience = (self.df_requests[(self.df_requests['cancel_ts'].notna()) & (self.df_requests['accept_ts'].notna())]['cancel_ts'] - self.df_requests[(self.df_requests['cancel_ts'].notna()) & (self.df_requests['accept_ts'].notna())]['accept_ts']).dt.total_seconds().median() / 60
+        pickup_patience = self.df_requests['patience_min'].median()
 
         return {
 
@@ -188,22 +372,19 @@ class CityCarDataHandler:
 
     def analyze_dropoff_gap(self):
         """Untersucht, warum Fahrten akzeptiert, aber nicht abgeschlossen werden."""
-        if self.df_requests is None:
-            self.load_data()
-
         print("\n" + "-" * 40)
         print("ANALYSE: WARUM DER ABBRUCH NACH 'ACCEPTED'?")
         print("-" * 40)
 
-        problem_rides = self.df_requests[
-            (self.df_requests['accept_ts'].notna()) &
-            (self.df_requests['dropoff_ts'].isna())
-        ]
+        problem_rides = (
+            self.df_requests['accept_ts'].notna().to_numpy() &
+            self.df_requests['dropoff_ts'].isna().to_numpy()
+        )
 
-        count_problems = len(problem_rides)
+        count_problems = np.count_nonzero(problem_rides)
         print(f"1. Fahrten akzeptiert aber nicht beendet: {count_problems}")
 
-        cancelled_count = problem_rides['cancel_ts'].notna().sum()
+        cancelled_count = np.count_nonzero(problem_rides & self.df_requests['cancel_ts'].notna().to_numpy())
         print(f"2. Davon offiziell storniert (cancel_ts): {cancelled_count}")
 
         if count_problems > 0:
@@ -216,40 +397,36 @@ class CityCarDataHandler:
 
     def analyze_cancellation_reasons(self):
         """Analysiert Wartezeiten als Grund für Stornierungen."""
-        if self.df_requests is None:
-            self.load_data()
-
         print("\n" + "-" * 50)
         print("      DEEP DIVE: WARTEZEITEN & STORNIERUNGEN      ")
         print("-" * 50)
 
-        completed_rides = self.df_requests[self.df_requests['dropoff_ts'].notna()].copy()
-        completed_rides['wait_time'] = (
-            completed_rides['pickup_ts'] - completed_rides['accept_ts']
-        ).dt.total_seconds() / 60
-        avg_wait_completed = completed_rides['wait_time'].mean()
+        # Masken einmal als NumPy-Arrays bilden, keine DataFrame-Kopien
+        dropoff_na = self.df_requests['dropoff_ts'].isna().to_numpy()
+        accept_ok = self.df_requests['accept_ts'].notna().to_numpy()
+        cancel_ok = self.df_requests['cancel_ts'].notna().to_numpy()
+        cancelled = accept_ok & dropoff_na & cancel_ok
 
-        print(f"Ø Wartezeit bei erfolgreichen Fahrten:  {avg_wait_completed:.2f} Minuten")
+        wait_min = self.df_requests['wait_min'].to_numpy()
+        patience_min = self.df_requests['patience_min'].to_numpy()
+
+        avg_wait_completed = pd.Series(wait_min[~dropoff_na]).mean()
 
-        cancelled_rides = self.df_requests[
-            (self.df_requests['accept_ts'].notna()) &
-            (self.df_requests['dropoff_ts'].isna()) &
-            (self.df_requests['cancel_ts'].notna())
-        ].copy()
+        print(f"Ø Wartezeit bei erfolgreichen Fahrten:  {avg_wait_completed:.2f} Minuten")
 
-        cancelled_rides['patience_time'] = (
-            cancelled_rides['cancel_ts'] - cancelled_rides['accept_ts']
-        ).dt.total_seconds() / 60
-        avg_wait_cancelled = cancelled_rides['patience_time'].mean()
+        patience_cancelled = patience_min[cancelled]
+        avg_wait_cancelled = pd.Series(patience_cancelled).mean()
 
         print(f"Ø Wartezeit vor Stornierung (Geduld): {avg_wait_cancelled:.2f} Minuten")
 
-        long_waiters = cancelled_rides[cancelled_rides['patience_time'] > 10]
-        print(f"Anzahl Stornierer mit Wartezeit > 10 Min: {len(long_waiters)} "
-              f"({len(long_waiters) / len(cancelled_rides) * 100:.1f}%)")
+        n_cancelled = np.count_nonzero(cancelled)
+        long_waiters = np.count_nonzero(patience_cancelled > 10)
+        print(f"Anzahl Stornierer mit Wartezeit > 10 Min: {long_waiters} "
+              f"({long_waiters / n_cancelled * 100:.1f}%)")
 
-        cancelled_rides['hour'] = cancelled_rides['cancel_ts'].dt.hour
-        top_hours = cancelled_rides['hour'].value_counts().head(3)
+        cancel_hist = _hour_histogram(self.df_requests['cancel_ts'].to_numpy()[cancelled])
+        top = np.argsort(-cancel_hist, kind='stable')[:3]
+        top_hours = pd.Series(cancel_hist[top], index=pd.Index(top, name='hour'), name='count')
         print("\nTop 3 Stunden mit den meisten Stornierungen:")
         print(top_hours)
 
@@ -260,12 +437,19 @@ class CityCarDataHandler:
         if self.df_funnel is None:
             self.merge_all_data()
 
-        platform_stats = self.df_funnel.groupby('platform').agg({
-            'app_download_key': 'nunique',
-            'dropoff_ts': lambda x: x.notna().sum()
-        }).reset_index()
+        # Abgeschlossene Fahrten als bool-Spalte, damit 'sum' statt eines Lambdas aggregiert
+        df_platform = self.df_funnel[['platform', 'app_download_key']].assign(
+            completed=self.df_funnel['dropoff_ts'].notna()
+        )
+
+        platform_stats = df_platform.groupby('platform', observed=True, sort=False).agg(
+            Downloads=('app_download_key', 'nunique'),
+            Completed_Rides=('completed', 'sum')
+        ).reset_index()
 
         platform_stats.columns = ['Platform', 'Downloads', 'Completed_Rides']
+        # sort=False liefert die Reihenfolge des ersten Auftretens; für Ausgabe und Chart wieder alphabetisch
+        platform_stats = platform_stats.sort_values('Platform', ignore_index=True)
         platform_stats['Conversion_Rate'] = (
             platform_stats['Completed_Rides'] / platform_stats['Downloads']
         ) * 100
@@ -278,32 +462,26 @@ class CityCarDataHandler:
             self.merge_all_data()
 
         df_age = self.df_funnel[self.df_funnel['age_range'].notna()]
-        results = []
-
-        for group in df_age['age_range'].unique():
-            group_data = df_age[df_age['age_range'] == group]
-
-            results.append({
-                'Age_Group': group,
-                '1_Signups': group_data['user_id'].nunique(),
-                '2_Requests': group_data[group_data['request_ts'].notna()]['user_id'].nunique(),
-                '3_Completed': group_data[group_data['dropoff_ts'].notna()]['user_id'].nunique(),
-                '4_Reviews': group_data[group_data['review_id'].notna()]['user_id'].nunique()
-            })
-
-        df_results = pd.DataFrame(results)
+        user_ids = df_age['user_id']
+
+        # Pro Funnel-Stufe eine maskierte user_id Spalte, dann ein einziger groupby-nunique
+        df_stages = pd.DataFrame({
+            'Age_Group': df_age['age_range'],
+            '1_Signups': user_ids,
+            '2_Requests': user_ids.where(df_age['request_ts'].notna()),
+            '3_Completed': user_ids.where(df_age['dropoff_ts'].notna()),
+            '4_Reviews': user_ids.where(df_age['review_count'].notna())
+        })
+
+        df_results = df_stages.groupby('Age_Group', observed=True, sort=False).nunique().reset_index()
         return df_results.sort_values('Age_Group')
 
     def analyze_surge_demand(self):
         """Analysiert die Nachfrage nach Tageszeit für Surge Pricing."""
-        if self.df_requests is None:
-            self.load_data()
-
-        self.df_requests['request_ts'] = pd.to_datetime(self.df_requests['request_ts'])
-        df_temp = self.df_requests[['request_ts']].copy()
-        df_temp['hour'] = df_temp['request_ts'].dt.hour
+        request_ts = self.df_requests['request_ts'].to_numpy()
+        request_hist = _hour_histogram(request_ts[~np.isnat(request_ts)])
 
-        return df_temp['hour'].value_counts().sort_index()
+        return pd.Series(request_hist, index=pd.Index(np.arange(24), name='hour'), name='count')
     
 
     
\ No newline at end of file
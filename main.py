@@ -16,12 +16,14 @@ def main():
     print("=" * 50)
 
     all_tables = data_handler.get_raw_tables()
+    # Die geladenen Tabellen enthalten nur die benötigten Spalten, daher die Spaltennamen aus den CSV-Köpfen
+    all_columns = data_handler.get_csv_columns()
 
     for name, table in all_tables.items():
         print(f"Tabelle: {name}")
         print(f" - Zeilen:  {len(table)}")
-        print(f" - Spalten: {len(table.columns)}")
-        print(f" - Spaltennamen: {table.columns.tolist()}")
+        print(f" - Spalten: {len(all_columns[name])}")
+        print(f" - Spaltennamen: {all_columns[name]}")
         print("-" * 30)
 
     # Warm-Up Statistiken